@@ -0,0 +1,194 @@
+import numpy as np
+import json
+import os
+import socket
+import time
+from chaotic_permutation import logistic_map, generate_permutation, generate_permutation_numpy
+from tiled_permutation import permute_loop, permute_tiled
+from keystream import encrypt_pixels_loop, encrypt_pixels_buffered, encrypt_pixels_inline
+
+# 自动选择后端: 首次使用某个操作时在一组规模上测量各候选实现，
+# 把每个规模下最快的后端 (分界点) 保存到本机的配置文件，之后按调用规模路由
+PROFILE_VERSION = 1
+PROFILE_ENV = "CHAOTIC_PROFILE"
+# 固定后端，便于可复现的性能测试: "numpy" 或 "image_permutation=threaded,keystream=inline"
+BACKEND_ENV = "CHAOTIC_BACKEND"
+REPEATS = 3
+# 某个后端比最快的慢这么多倍后，不再在更大的规模上测量它
+DROP_RATIO = 10
+
+BACKENDS = {
+    "permutation": {
+        "python": generate_permutation,
+        "numpy": generate_permutation_numpy,
+    },
+    "image_permutation": {
+        "python": permute_loop,
+        "numpy": lambda image, row_index, col_index: permute_tiled(image, row_index, col_index,
+                                                                   tile_rows=len(row_index) or 1, workers=1),
+        "threaded": permute_tiled,
+    },
+    "keystream": {
+        "python": encrypt_pixels_loop,
+        "buffered": encrypt_pixels_buffered,
+        "inline": encrypt_pixels_inline,
+    },
+}
+
+# 各操作测量使用的规模，permutation 为序列长度，其余为像素分量个数
+SIZE_LADDER = {
+    "permutation": [16, 64, 256, 1024, 4096],
+    "image_permutation": [16 ** 2, 64 ** 2, 256 ** 2, 1024 ** 2, 2048 ** 2],
+    "keystream": [256, 4096, 65536],
+}
+
+def sample_args(op, size):
+    rng = np.random.default_rng(0)
+    if op == "permutation":
+        return (logistic_map, 0.1, size), {"mu": 3.99}
+    side = max(1, int(round(size ** 0.5)))
+    image = rng.integers(0, 256, (side, side), dtype=np.uint8)
+    if op == "image_permutation":
+        return (image, rng.permutation(side), rng.permutation(side)), {}
+    return (image, logistic_map, 0.1), {"mu": 3.99}
+
+def op_size(op, args):
+    if op == "permutation":
+        return args[2]
+    if op == "image_permutation":
+        image, row_index, col_index = args[:3]
+        return len(row_index) * len(col_index) * int(np.prod(image.shape[2:], dtype=np.int64))
+    return args[0].size
+
+def time_backend(func, args, kwargs, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark(op, sizes=None, repeats=REPEATS):
+    # 返回分界点列表 [[规模, 后端], ...]: 调用规模不小于该规模时使用对应后端
+    if sizes is None:
+        sizes = SIZE_LADDER[op]
+    candidates = list(BACKENDS[op])
+    crossovers = []
+    for size in sizes:
+        args, kwargs = sample_args(op, size)
+        times = {name: time_backend(BACKENDS[op][name], args, kwargs, repeats) for name in candidates}
+        fastest = min(times, key=times.get)
+        if not crossovers or crossovers[-1][1] != fastest:
+            crossovers.append([size, fastest])
+        candidates = [name for name in candidates if times[name] <= times[fastest] * DROP_RATIO]
+    crossovers[0][0] = 0
+    return crossovers
+
+def profile_path():
+    if os.environ.get(PROFILE_ENV):
+        return os.environ[PROFILE_ENV]
+    folder = os.path.join(os.path.expanduser("~"), ".cache", "chaotic_cipher")
+    return os.path.join(folder, f"autotune-{socket.gethostname()}.json")
+
+def machine_info():
+    return {"version": PROFILE_VERSION, "cpu_count": os.cpu_count(), "numpy": np.__version__}
+
+def load_profile(path=None):
+    # 机器信息不一致 (如换了 NumPy 版本) 或文件损坏时丢弃旧结果，重新测量
+    path = path or profile_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return {"machine": machine_info(), "ops": {}}
+    if profile.get("machine") != machine_info():
+        return {"machine": machine_info(), "ops": {}}
+    ops = {op: crossovers for op, crossovers in profile.get("ops", {}).items()
+           if op in BACKENDS and all(name in BACKENDS[op] for _, name in crossovers)}
+    return {"machine": machine_info(), "ops": ops}
+
+def save_profile(profile, path=None):
+    path = path or profile_path()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+    except OSError as e:
+        print(f"无法保存后端配置文件 '{path}': {e}")
+
+def parse_override(value):
+    # 只写后端名时作用于所有提供该后端的操作
+    overrides = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        if "=" in item:
+            op, name = (s.strip() for s in item.split("=", 1))
+            overrides[op] = name
+        else:
+            for op in BACKENDS:
+                if item in BACKENDS[op]:
+                    overrides.setdefault(op, item)
+    return overrides
+
+class Dispatcher:
+    def __init__(self, path=None):
+        self.path = path
+        self.profile = None
+        self.overrides = {}
+
+    def set_override(self, op, backend=None):
+        if backend is None:
+            self.overrides.pop(op, None)
+        elif backend not in BACKENDS[op]:
+            raise ValueError(f"未知的后端: {op}={backend}")
+        else:
+            self.overrides[op] = backend
+
+    def crossovers(self, op):
+        if self.profile is None:
+            self.profile = load_profile(self.path)
+        if op not in self.profile["ops"]:
+            print(f"首次使用 {op}，正在测量各后端性能...")
+            self.profile["ops"][op] = benchmark(op)
+            save_profile(self.profile, self.path)
+        return self.profile["ops"][op]
+
+    def choose(self, op, size, backend=None):
+        backend = backend or self.overrides.get(op) or parse_override(os.environ.get(BACKEND_ENV)).get(op)
+        if backend is not None:
+            if backend not in BACKENDS[op]:
+                raise ValueError(f"未知的后端: {op}={backend}")
+            return backend
+        chosen = None
+        for threshold, name in self.crossovers(op):
+            if size >= threshold or chosen is None:
+                chosen = name
+        return chosen
+
+    def run(self, op, *args, backend=None, **kwargs):
+        name = self.choose(op, op_size(op, args), backend)
+        return BACKENDS[op][name](*args, **kwargs)
+
+dispatcher = Dispatcher()
+
+def generate_permutation_auto(chaotic_map, seed, size, transient=1000, backend=None, **params):
+    return dispatcher.run("permutation", chaotic_map, seed, size, transient, backend=backend, **params)
+
+def permute_auto(image, row_index, col_index, backend=None):
+    return dispatcher.run("image_permutation", image, row_index, col_index, backend=backend)
+
+def encrypt_pixels_auto(image_array, chaotic_map, seed, backend=None, **map_params):
+    return dispatcher.run("keystream", image_array, chaotic_map, seed, backend=backend, **map_params)
+
+def main():
+    # 重新测量所有操作并覆盖本机配置文件
+    profile = {"machine": machine_info(), "ops": {}}
+    for op in BACKENDS:
+        print(f"测量 {op} ...")
+        profile["ops"][op] = benchmark(op)
+        for threshold, name in profile["ops"][op]:
+            print(f"  规模 >= {threshold}: {name}")
+    save_profile(profile)
+    print(f"后端配置已保存为 '{profile_path()}'")
+
+if __name__ == "__main__":
+    main()
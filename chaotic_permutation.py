@@ -15,6 +15,12 @@ def chebyshev_map(x, n=3):
 def tent_map(x, mu=1.99):
     return mu * np.minimum(x, 1 - x)
 
+def check_distinct(sequence):
+    # 退化的种子 (如 Chebyshev 取 0.5、Logistic 取 1.0) 使轨迹落入不动点，出现重复值时求秩得到的不是置换
+    # 定义域外的种子产生 NaN，排序结果恰为恒等置换，等于不加密，同样拒绝
+    if not np.all(np.isfinite(sequence)) or len(set(sequence)) != len(sequence):
+        raise ValueError("混沌序列出现重复值或非有限值，无法生成有效的置换，请更换种子")
+
 def generate_permutation(chaotic_map, seed, size, transient=1000, **params):
     x = seed
     
@@ -25,6 +31,7 @@ def generate_permutation(chaotic_map, seed, size, transient=1000, **params):
     for _ in range(size - 1):
         x = chaotic_map(x, **params)
         sequence.append(x)
+    check_distinct(sequence)
     
     sorted_sequence = sorted(sequence)
     permutation = []
@@ -33,7 +40,246 @@ def generate_permutation(chaotic_map, seed, size, transient=1000, **params):
     
     return permutation
 
+# 定点数映射: 状态为 uint64 存储的 Q0.32 定点数 (x / 2^32 即 [0, 1) 上的实数)
+# 只使用整数运算，生成的序列在任何平台上逐字节一致
+FIXED_BITS = 32
+FIXED_ONE = np.uint64(1 << FIXED_BITS)
+FIXED_MAX = np.uint64((1 << FIXED_BITS) - 1)
+FIXED_LANES = 256
+FIXED_KEY_PREFIX = "fx1-"
+# 定点迭代周期有限，每步用 xorshift 扰动最低若干位以抑制动力学退化
+FIXED_PERTURB_MASK = np.uint64(0xFF)
+FIXED_BYTE_SHIFT = np.uint64(16)
+MASK64 = (1 << 64) - 1
+
+def logistic_map_fixed(x, mu=3.99):
+    mu_fp = np.uint64(round(mu * (1 << 30)))
+    t = (x * (FIXED_ONE - x)) >> np.uint64(32)
+    return np.minimum((mu_fp * t) >> np.uint64(30), FIXED_MAX)
+
+def chebyshev_map_fixed(x, n=3):
+    # [0, 1] 线性映射到 [-1, 1]，用 Q1.31 有符号定点数按 T_{k+1} = 2xT_k - T_{k-1} 递推
+    one = np.int64(1 << 31)
+    s = x.astype(np.int64) - one
+    t_prev, t = np.full_like(s, one), s
+    if n == 0:
+        t = t_prev
+    for _ in range(n - 1):
+        t_prev, t = t, ((s * t) >> np.int64(30)) - t_prev
+        t = np.clip(t, -one, one)
+    return np.minimum((t + one).astype(np.uint64), FIXED_MAX)
+
+def tent_map_fixed(x, mu=1.99):
+    mu_fp = np.uint64(round(mu * (1 << 31)))
+    m = np.minimum(x, FIXED_ONE - x)
+    return np.minimum((mu_fp * m) >> np.uint64(31), FIXED_MAX)
+
+def parse_fixed_key(key, prefix=FIXED_KEY_PREFIX):
+    # 定点密钥格式: "fx1-" + 16位十六进制 (64位整数)，也接受裸十六进制或整数
+    if isinstance(key, (int, np.integer)):
+        value = int(key)
+    else:
+        key = key.strip().lower()
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+        value = int(key, 16)
+    if not 0 <= value <= MASK64:
+        raise ValueError(f"定点密钥超出64位范围: {key}")
+    return value
+
+def format_fixed_key(key):
+    return f"{FIXED_KEY_PREFIX}{parse_fixed_key(key):016x}"
+
+def splitmix64(state):
+    state = (state + 0x9E3779B97F4A7C15) & MASK64
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return state, z ^ (z >> 31)
+
+def init_fixed_lanes(key, lanes=FIXED_LANES):
+    # 由64位密钥展开出每条通道的初始值和扰动状态
+    state = parse_fixed_key(key)
+    xs, ps = [], []
+    for _ in range(lanes):
+        state, z = splitmix64(state)
+        xs.append((z >> 32) | 1)
+        state, z = splitmix64(state)
+        ps.append(z | 1)
+    return np.array(xs, dtype=np.uint64), np.array(ps, dtype=np.uint64)
+
+def step_fixed_lanes(chaotic_map, x, p, params):
+    p ^= p << np.uint64(13)
+    p ^= p >> np.uint64(7)
+    p ^= p << np.uint64(17)
+    x = chaotic_map(x, **params) ^ (p & FIXED_PERTURB_MASK)
+    return x, p
+
+def run_fixed_lanes(chaotic_map, x, p, steps, params):
+    # 多条通道同步迭代，每步向量化地产出 lanes 个值，按步交错排列
+    sequence = np.empty((steps, x.shape[0]), dtype=np.uint64)
+    for i in range(steps):
+        x, p = step_fixed_lanes(chaotic_map, x, p, params)
+        sequence[i] = x
+    return sequence.reshape(-1), x, p
+
+def fixed_trajectory(chaotic_map, key, size, transient=1000, lanes=FIXED_LANES, **params):
+    x, p = init_fixed_lanes(key, lanes)
+    for _ in range(transient):
+        x, p = step_fixed_lanes(chaotic_map, x, p, params)
+    
+    sequence, x, p = run_fixed_lanes(chaotic_map, x, p, -(-size // lanes), params)
+    return sequence[:size]
+
+def fixed_to_bytes(sequence):
+    return ((sequence >> FIXED_BYTE_SHIFT) & np.uint64(0xFF)).astype(np.uint8)
+
+def fixed_keystream(chaotic_map, key, size, transient=1000, **params):
+    return fixed_to_bytes(fixed_trajectory(chaotic_map, key, size, transient, **params))
+
+def rank_permutation(sequence):
+    # 稳定排序求秩，相同值按出现顺序排列，保证结果一定是置换
+    order = np.argsort(sequence, kind="stable")
+    permutation = np.empty(sequence.shape[0], dtype=np.int64)
+    permutation[order] = np.arange(sequence.shape[0])
+    return permutation.tolist()
+
+def generate_permutation_fixed(chaotic_map, key, size, transient=1000, **params):
+    return rank_permutation(fixed_trajectory(chaotic_map, key, size, transient, **params))
+
+def generate_permutation_numpy(chaotic_map, seed, size, transient=1000, **params):
+    # 迭代过程与 generate_permutation 相同，用排序求秩代替 O(N^2) 的 index 查找
+    x = seed
+    for _ in range(transient):
+        x = chaotic_map(x, **params)
+    
+    sequence = np.empty(size)
+    for i in range(size):
+        sequence[i] = x
+        x = chaotic_map(x, **params)
+    check_distinct(sequence.tolist())
+    return rank_permutation(sequence)
+
+# 界面和命令行中使用的映射名称及其默认参数
+MAPS = {
+    "logistic": (logistic_map, {"mu": 3.99}),
+    "chebyshev": (chebyshev_map, {"n": 3}),
+    "tent": (tent_map, {"mu": 1.99}),
+    "logistic_fx": (logistic_map_fixed, {"mu": 3.99}),
+    "chebyshev_fx": (chebyshev_map_fixed, {"n": 3}),
+    "tent_fx": (tent_map_fixed, {"mu": 1.99}),
+}
+
+# 主密钥: 由一个64位主密钥派生行、列、像素三条序列的映射和子密钥
+MASTER_KEY_PREFIX = "mk1-"
+MASTER_STREAMS = ("row", "col", "pixel")
+MASTER_MAPS = ("logistic_fx", "chebyshev_fx", "tent_fx")
+MASTER_CHUNK_STEPS = 4096
+
+def format_master_key(key):
+    return f"{MASTER_KEY_PREFIX}{parse_fixed_key(key, MASTER_KEY_PREFIX):016x}"
+
+def derive_key_schedule(master_key):
+    state = parse_fixed_key(master_key, MASTER_KEY_PREFIX)
+    schedule = {}
+    for name in MASTER_STREAMS:
+        state, z = splitmix64(state)
+        map_type = MASTER_MAPS[z % len(MASTER_MAPS)]
+        state, z = splitmix64(state)
+        schedule[name] = (map_type, z)
+    return schedule
+
+def lockstep_map(groups):
+    # 把各条序列的映射合成一个作用于整个向量的映射，同一映射的通道一次计算
+    def step(x):
+        out = np.empty_like(x)
+        for chaotic_map, params, index in groups:
+            out[index] = chaotic_map(x[index], **params)
+        return out
+    return step
+
+def build_lockstep(map_types, lanes):
+    # 只剩一种映射时直接使用该映射，省去分组循环
+    if len(set(map_types)) == 1:
+        return MAPS[map_types[0]]
+    groups = {}
+    for k, map_type in enumerate(map_types):
+        groups.setdefault(map_type, []).extend(range(k * lanes, (k + 1) * lanes))
+    # 连续的通道用切片索引，避免花式索引的额外拷贝
+    return lockstep_map([MAPS[map_type] + (slice(index[0], index[-1] + 1) if index[-1] - index[0] + 1 == len(index)
+                                           else np.array(index),)
+                         for map_type, index in groups.items()]), {}
+
+def generate_master_streams(master_key, height, width, pixel_count, transient=1000, lanes=FIXED_LANES):
+    # 行、列、像素三组通道拼成一个向量同步迭代: 只走一次过渡期；
+    # 行、列序列所需的步数很少，生成完后即从向量中移除，之后只迭代仍需要的通道
+    # 结果与用派生子密钥分别调用 generate_permutation_fixed / fixed_keystream 完全一致
+    schedule = derive_key_schedule(master_key)
+    sizes = {"row": height, "col": width, "pixel": pixel_count}
+    steps = {name: -(-size // lanes) for name, size in sizes.items()}
+
+    xs, ps = zip(*(init_fixed_lanes(schedule[name][1], lanes) for name in MASTER_STREAMS))
+    x, p = np.concatenate(xs), np.concatenate(ps)
+    active = list(MASTER_STREAMS)
+    step, params = build_lockstep([schedule[name][0] for name in active], lanes)
+
+    for _ in range(transient):
+        x, p = step_fixed_lanes(step, x, p, params)
+
+    outputs = {name: [] for name in MASTER_STREAMS}
+    done = 0
+    while active:
+        n = min(min(steps[name] for name in active) - done, MASTER_CHUNK_STEPS)
+        if n > 0:
+            sequence, x, p = run_fixed_lanes(step, x, p, n, params)
+            sequence = sequence.reshape(n, len(active), lanes)
+            for k, name in enumerate(active):
+                part = sequence[:, k].reshape(-1)
+                outputs[name].append(fixed_to_bytes(part) if name == "pixel" else part)
+            done += n
+
+        keep = [k for k, name in enumerate(active) if steps[name] > done]
+        if len(keep) < len(active):
+            x = x.reshape(len(active), lanes)[keep].reshape(-1)
+            p = p.reshape(len(active), lanes)[keep].reshape(-1)
+            active = [active[k] for k in keep]
+            if active:
+                step, params = build_lockstep([schedule[name][0] for name in active], lanes)
+
+    def collect(name):
+        parts = outputs[name]
+        dtype = np.uint8 if name == "pixel" else np.uint64
+        return np.concatenate(parts)[:sizes[name]] if parts else np.empty(0, dtype=dtype)
+
+    perm_y = rank_permutation(collect("row"))
+    perm_x = rank_permutation(collect("col"))
+    return perm_x, perm_y, collect("pixel")
+
+# 定点映射的已知答案: 固定密钥下密钥流第 0-15、256-271 字节 (跨越第一步的全部通道) 和长度16的置换
+# 运算、通道数或扰动常数的任何改动都会使其不一致，保证各机器生成的字节相同
+FIXED_TEST_KEY = "fx1-0123456789abcdef"
+FIXED_KNOWN_ANSWERS = {
+    "logistic_fx": ("deaad5eca1c009fb056d0d9b5b1a22fa", "b45b1e55886c1a931c4c3b1c8f302c29",
+                    "04070c010b090e0a080d03020f060500"),
+    "chebyshev_fx": ("7f3eb02e1281a000d27d0312c1cbf3a9", "b3341426cb8920032163812db718e9fc",
+                     "050a0806070109000c040f030b0e0d02"),
+    "tent_fx": ("e059a499f9685286e58f76a19aa2bb12", "c8e07e95eabc8ce5d8cc09f1d292bfe5",
+                "040c0e020805060f0d00090a01030b07"),
+}
+
+def check_fixed_known_answers():
+    for map_type, (head, tail, perm) in FIXED_KNOWN_ANSWERS.items():
+        chaotic_map, params = MAPS[map_type]
+        keystream = fixed_keystream(chaotic_map, FIXED_TEST_KEY, 272, **params)
+        permutation = generate_permutation_fixed(chaotic_map, FIXED_TEST_KEY, 16, **params)
+        got = (keystream[:16].tobytes().hex(), keystream[256:].tobytes().hex(), bytes(permutation).hex())
+        if got != (head, tail, perm):
+            raise ValueError(f"{map_type} 定点映射的输出与已知答案不一致: {got}")
+    print("定点映射已知答案检查通过")
+
 def main():
+    check_fixed_known_answers()
+    
     size = 500
     seed = 0.1
     
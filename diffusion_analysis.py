@@ -0,0 +1,311 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from chaotic_permutation import logistic_map, chebyshev_map, tent_map, generate_master_streams, format_master_key
+from PIL import Image
+import random
+import time
+import csv
+import os
+import sys
+
+plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'KaiTi']
+plt.rcParams['axes.unicode_minus'] = False
+
+# 一批密文图像的总字节数上限，大图会自动减小批大小
+BATCH_BYTES = 128 << 20
+# 指标按行分块累加，每块的临时数组只覆盖这么多行
+ROW_BLOCK = 64
+
+# 批量分析: 同一映射的多组种子作为一个向量同步迭代，
+# 所有指标都以批维度 (B, ...) 上的 NumPy 归约计算
+
+def batch_trajectories(chaotic_map, seeds, size, transient=1000, **params):
+    x = np.asarray(seeds, dtype=np.float64)
+    for _ in range(transient):
+        x = chaotic_map(x, **params)
+
+    sequence = np.empty((x.shape[0], size))
+    for i in range(size):
+        sequence[:, i] = x
+        x = chaotic_map(x, **params)
+    return sequence
+
+def batch_permutations(chaotic_map, seeds, size, transient=1000, **params):
+    # 与 generate_permutation 相同: 每个位置映射到其值在序列中的秩
+    sequence = batch_trajectories(chaotic_map, seeds, size, transient, **params)
+    order = np.argsort(sequence, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(size)[np.newaxis, :], axis=1)
+    return ranks
+
+def batch_keystream(chaotic_map, seeds, size, transient=1000, **params):
+    # 与 encrypt_pixels 相同: 过渡期后每个像素分量先迭代一次再取值
+    # 每步直接转为 uint8，不保存浮点轨迹
+    x = np.asarray(seeds, dtype=np.float64)
+    for _ in range(transient):
+        x = chaotic_map(x, **params)
+
+    keystream = np.empty((x.shape[0], size), dtype=np.uint8)
+    for i in range(size):
+        x = chaotic_map(x, **params)
+        value = (x + 1) / 2 if chaotic_map == chebyshev_map else x
+        keystream[:, i] = (value * 255).astype(np.uint8)
+    return keystream
+
+def batch_encrypt(images, perm_x, perm_y, keystream):
+    # 与 encrypt_img 相同: 原 (i, j) 处的像素移动到 (perm_y[i], perm_x[j])，
+    # 即密文 (r, c) 处取原图 (inv_y[r], inv_x[c]) 处的像素，再与密钥流异或
+    inv_x = np.argsort(perm_x, axis=1)
+    inv_y = np.argsort(perm_y, axis=1)
+    extra = (1,) * (images.ndim - 3)
+
+    rows = np.take_along_axis(images, inv_y.reshape(inv_y.shape + (1,) + extra), axis=1)
+    encrypted = np.take_along_axis(rows, inv_x.reshape((inv_x.shape[0], 1, inv_x.shape[1]) + extra), axis=2)
+    del rows
+    encrypted ^= keystream.reshape(encrypted.shape)
+    return encrypted
+
+def row_blocks(height, block=ROW_BLOCK):
+    return [(start, min(start + block, height)) for start in range(0, height, block)]
+
+def npcr(c1, c2):
+    batch = c1.shape[0]
+    changed = np.zeros(batch)
+    for start, end in row_blocks(c1.shape[1]):
+        changed += np.count_nonzero((c1[:, start:end] != c2[:, start:end]).reshape(batch, -1), axis=1)
+    return changed / (c1.size // batch) * 100
+
+def uaci(c1, c2):
+    batch = c1.shape[0]
+    total = np.zeros(batch)
+    for start, end in row_blocks(c1.shape[1]):
+        diff = np.abs(c1[:, start:end].astype(np.int16) - c2[:, start:end].astype(np.int16))
+        total += diff.reshape(batch, -1).sum(axis=1)
+    return total / (c1.size // batch) / 255 * 100
+
+def histogram_chi2(images):
+    # 每块的直方图通过一次 bincount 得到: 第 b 张图的灰度值偏移 b*256
+    batch = images.shape[0]
+    hist = np.zeros((batch, 256), dtype=np.int64)
+    offsets = np.arange(batch, dtype=np.int64)[:, np.newaxis] * 256
+    for start, end in row_blocks(images.shape[1]):
+        flat = images[:, start:end].reshape(batch, -1).astype(np.int64)
+        hist += np.bincount((flat + offsets).ravel(), minlength=batch * 256).reshape(batch, 256)
+    expected = (images.size // batch) / 256
+    return np.sum((hist - expected) ** 2, axis=1) / expected
+
+def adjacent_correlation(images, direction="horizontal"):
+    # 按行分块累加 Σx、Σy、Σx²、Σy²、Σxy，再由这些和计算相关系数
+    batch, height, width = images.shape[:3]
+    sums = np.zeros((5, batch))
+    count = 0
+    for start, end in row_blocks(height - (direction != "horizontal")):
+        if direction == "horizontal":
+            x, y = images[:, start:end, :-1], images[:, start:end, 1:]
+        elif direction == "vertical":
+            x, y = images[:, start:end, :], images[:, start + 1:end + 1, :]
+        else:
+            x, y = images[:, start:end, :-1], images[:, start + 1:end + 1, 1:]
+        x = x.reshape(batch, -1).astype(np.float64)
+        y = y.reshape(batch, -1).astype(np.float64)
+        sums += [x.sum(axis=1), y.sum(axis=1), (x * x).sum(axis=1), (y * y).sum(axis=1), (x * y).sum(axis=1)]
+        count += x.shape[1]
+
+    sx, sy, sxx, syy, sxy = sums
+    denom = np.sqrt((count * sxx - sx * sx) * (count * syy - sy * sy))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denom > 0, (count * sxy - sx * sy) / denom, 0.0)
+
+def one_pixel_changed(image, rng):
+    changed = np.copy(image)
+    i = rng.randrange(image.shape[0])
+    j = rng.randrange(image.shape[1])
+    changed[i, j] = (changed[i, j].astype(np.int16) + 1) % 256
+    return changed
+
+def analyze_map(image, chaotic_map, map_params, seeds, changed_images):
+    # seeds: (B, 3) 行/列/像素种子；changed_images: (B, ...) 每组对应的单像素修改明文
+    height, width = image.shape[:2]
+    batch = seeds.shape[0]
+
+    perm_y = batch_permutations(chaotic_map, seeds[:, 0], height, **map_params)
+    perm_x = batch_permutations(chaotic_map, seeds[:, 1], width, **map_params)
+    keystream = batch_keystream(chaotic_map, seeds[:, 2], image.size, **map_params)
+
+    plain = np.broadcast_to(image, (batch,) + image.shape)
+    c1 = batch_encrypt(plain, perm_x, perm_y, keystream)
+    c2 = batch_encrypt(changed_images, perm_x, perm_y, keystream)
+    return diffusion_metrics(c1, c2)
+
+def analyze_master_keys(image, master_keys, changed_images):
+    # 每个主密钥一次生成行、列、像素三条序列，再按批计算指标
+    height, width = image.shape[:2]
+    streams = [generate_master_streams(key, height, width, image.size) for key in master_keys]
+    perm_x = np.array([s[0] for s in streams])
+    perm_y = np.array([s[1] for s in streams])
+    keystream = np.stack([s[2] for s in streams])
+
+    plain = np.broadcast_to(image, (len(master_keys),) + image.shape)
+    c1 = batch_encrypt(plain, perm_x, perm_y, keystream)
+    c2 = batch_encrypt(changed_images, perm_x, perm_y, keystream)
+    return diffusion_metrics(c1, c2)
+
+def diffusion_metrics(c1, c2):
+    return {
+        "npcr": npcr(c1, c2),
+        "uaci": uaci(c1, c2),
+        "chi2": histogram_chi2(c1),
+        "corr_h": adjacent_correlation(c1, "horizontal"),
+        "corr_v": adjacent_correlation(c1, "vertical"),
+        "corr_d": adjacent_correlation(c1, "diagonal"),
+    }
+
+def limit_batch(image, batch_size, max_bytes=BATCH_BYTES):
+    return max(1, min(batch_size, max_bytes // max(1, image.nbytes)))
+
+def test_configs(image, chaotic_map, map_name, map_params=None, num_seeds=30, batch_size=16, rng=None):
+    if map_params is None:
+        map_params = {}
+    if rng is None:
+        rng = random.Random()
+
+    seeds = np.array([[rng.uniform(0.1, 0.9) for _ in range(3)] for _ in range(num_seeds)])
+
+    results = {}
+    batch_size = limit_batch(image, batch_size)
+    total_steps = -(-num_seeds // batch_size)
+    for k, start in enumerate(range(0, num_seeds, batch_size)):
+        end = min(start + batch_size, num_seeds)
+        # 单像素修改的明文只为当前批生成，不一次性保存全部
+        changed = np.stack([one_pixel_changed(image, rng) for _ in range(start, end)])
+        batch_results = analyze_map(image, chaotic_map, map_params, seeds[start:end], changed)
+        for key, value in batch_results.items():
+            results.setdefault(key, []).append(value)
+        print(f"处理进度: {k+1}/{total_steps}")
+
+    results = {key: np.concatenate(value) for key, value in results.items()}
+    return seeds, results
+
+def test_master_keys(image, num_keys=30, batch_size=16, rng=None):
+    if rng is None:
+        rng = random.Random()
+
+    master_keys = [format_master_key(rng.getrandbits(64)) for _ in range(num_keys)]
+
+    results = {}
+    batch_size = limit_batch(image, batch_size)
+    total_steps = -(-num_keys // batch_size)
+    for k, start in enumerate(range(0, num_keys, batch_size)):
+        end = min(start + batch_size, num_keys)
+        changed = np.stack([one_pixel_changed(image, rng) for _ in range(start, end)])
+        batch_results = analyze_master_keys(image, master_keys[start:end], changed)
+        for key, value in batch_results.items():
+            results.setdefault(key, []).append(value)
+        print(f"处理进度: {k+1}/{total_steps}")
+
+    results = {key: np.concatenate(value) for key, value in results.items()}
+    return master_keys, results
+
+def make_test_image(height=256, width=256):
+    # 平滑渐变加少量噪声，相邻像素相关性高，便于观察加密前后的变化
+    yy, xx = np.mgrid[0:height, 0:width]
+    image = (xx + yy) * 255.0 / (height + width - 2)
+    image += np.random.default_rng(0).normal(0, 4, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+# 输出分析结果
+def plot_diffusion(image, chaotic_maps, map_names, map_params_list, num_seeds=30, batch_size=16, num_master_keys=0):
+    height, width = image.shape[:2]
+    folder_path = f"./plot/diffusion_test_count={num_seeds}_{height}x{width}"
+    os.makedirs(folder_path, exist_ok=True)
+
+    rng = random.Random()
+    all_results = []
+
+    csv_path = f"{folder_path}/diffusion_metrics.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["map", "row_seed", "col_seed", "pixel_seed",
+                         "npcr", "uaci", "chi2", "corr_h", "corr_v", "corr_d"])
+        metric_keys = ["npcr", "uaci", "chi2", "corr_h", "corr_v", "corr_d"]
+
+        for chaotic_map, map_name, map_params in zip(chaotic_maps, map_names, map_params_list):
+            print(f"\n分析 {map_name} 映射...")
+            start_time = time.time()
+            seeds, results = test_configs(image, chaotic_map, map_name, map_params, num_seeds, batch_size, rng)
+            print(f"{map_name} 映射分析耗时: {time.time() - start_time:.2f} 秒")
+            all_results.append(results)
+
+            for i in range(num_seeds):
+                writer.writerow([map_name] + [f"{s:.6f}" for s in seeds[i]] +
+                                [f"{results[key][i]:.6f}" for key in metric_keys])
+
+        if num_master_keys > 0:
+            print(f"\n分析主密钥模式...")
+            start_time = time.time()
+            master_keys, results = test_master_keys(image, num_master_keys, batch_size, rng)
+            print(f"主密钥模式分析耗时: {time.time() - start_time:.2f} 秒")
+            all_results.append(results)
+            map_names = list(map_names) + ["主密钥"]
+
+            # 主密钥模式下三个种子列均记录主密钥
+            for i in range(num_master_keys):
+                writer.writerow(["master"] + [master_keys[i]] * 3 +
+                                [f"{results[key][i]:.6f}" for key in metric_keys])
+    print(f"\n各组参数的分析结果已保存为 '{csv_path}'")
+
+    plain = image[np.newaxis]
+    print(f"明文相邻像素相关性: 水平 {adjacent_correlation(plain, 'horizontal')[0]:.4f}, "
+          f"垂直 {adjacent_correlation(plain, 'vertical')[0]:.4f}, "
+          f"对角 {adjacent_correlation(plain, 'diagonal')[0]:.4f}")
+
+    metrics = [
+        ("npcr", "NPCR (%)"),
+        ("uaci", "UACI (%)"),
+        ("chi2", "直方图卡方值"),
+        ("corr_h", "水平相邻相关系数"),
+        ("corr_v", "垂直相邻相关系数"),
+        ("corr_d", "对角相邻相关系数"),
+    ]
+
+    plt.figure(figsize=(15, 8))
+    for k, (key, label) in enumerate(metrics):
+        plt.subplot(2, 3, k + 1)
+        plt.boxplot([results[key] for results in all_results])
+        plt.xticks(range(1, len(map_names) + 1), map_names)
+        plt.title(label)
+        plt.grid(True)
+    plt.suptitle(f"不同混沌映射的扩散性能指标 (每个映射使用{num_seeds}组不同种子)")
+    plt.tight_layout()
+
+    filename = f"{folder_path}/diffusion_metrics.png"
+    plt.savefig(filename, dpi=300)
+    print(f"扩散性能分析结果已保存为 '{filename}'")
+
+    plt.show()
+
+def main():
+    chaotic_maps = [logistic_map, chebyshev_map, tent_map]
+    map_names = ["Logistic", "Chebyshev", "Tent"]
+    map_params_list = [
+        {"mu": 3.99},
+        {"n": 3},
+        {"mu": 1.99}
+    ]
+
+    num_seeds = 100
+    batch_size = 16
+    num_master_keys = 100
+
+    if len(sys.argv) > 1:
+        image = np.array(Image.open(sys.argv[1]))
+    else:
+        image = make_test_image()
+
+    print(f"开始分析图像加密的扩散性能...")
+    print(f"参数设置: 图像大小={image.shape}, 每个映射使用{num_seeds}组不同种子, 批大小={batch_size}")
+
+    plot_diffusion(image, chaotic_maps, map_names, map_params_list, num_seeds, batch_size, num_master_keys)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog
 import numpy as np
 from PIL import Image, ImageTk
 import os
 import io
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from chaotic_permutation import logistic_map, chebyshev_map, tent_map, generate_permutation
+from chaotic_permutation import generate_permutation_fixed, fixed_keystream, parse_fixed_key, MAPS
+from chaotic_permutation import generate_master_streams, derive_key_schedule, MASTER_KEY_PREFIX
+from image_container import save_container, load_container
+from text_view import PagedTextView
+from tiled_permutation import inverse_permutation, check_permutation
+from autotune import generate_permutation_auto, permute_auto, encrypt_pixels_auto
 
 def encrypt_text(message, disorganizedtable):
     c_list = [''] * len(message)
@@ -26,67 +31,34 @@ def decrypt_text(ciphertext, disorganizedtable):
     return ''.join(m_list)
 
 def encrypt_img(image_array, permutation_x, permutation_y):
-    height, width = image_array.shape[:2]
-    encrypted_image = np.zeros_like(image_array)
-    
-    for i in range(height):
-        for j in range(width):
-            new_i = permutation_y[i]
-            new_j = permutation_x[j]
-            encrypted_image[new_i, new_j] = image_array[i, j]
-    
-    return encrypted_image
+    return permute_auto(image_array, inverse_permutation(permutation_y), inverse_permutation(permutation_x))
 
 def decrypt_img(encrypted_image, permutation_x, permutation_y):
-    height, width = encrypted_image.shape[:2]
-    decrypted_image = np.zeros_like(encrypted_image)
-    
-    inverse_perm_x = [0] * len(permutation_x)
-    for i, pos in enumerate(permutation_x):
-        inverse_perm_x[pos] = i
-    
-    inverse_perm_y = [0] * len(permutation_y)
-    for i, pos in enumerate(permutation_y):
-        inverse_perm_y[pos] = i
-    
-    for i in range(height):
-        for j in range(width):
-            orig_i = inverse_perm_y[i]
-            orig_j = inverse_perm_x[j]
-            decrypted_image[orig_i, orig_j] = encrypted_image[i, j]
-    
-    return decrypted_image
+    return permute_auto(encrypted_image, check_permutation(permutation_y), check_permutation(permutation_x))
 
 def encrypt_pixels(image_array, chaotic_map, seed, **map_params):
-    height, width = image_array.shape[:2]
-    channels = 1 if len(image_array.shape) == 2 else image_array.shape[2]
-    
-    encrypted_image = np.copy(image_array)
-    
-    x = seed
-    for _ in range(1000):
-        x = chaotic_map(x, **map_params)
-    
-    for i in range(height):
-        for j in range(width):
-            for c in range(channels):
-                x = chaotic_map(x, **map_params)
-                
-                if chaotic_map == chebyshev_map:
-                    chaotic_value = int(((x + 1) / 2) * 255)
-                else:
-                    chaotic_value = int(x * 255)
-                
-                if len(image_array.shape) == 2:
-                    encrypted_image[i, j] = encrypted_image[i, j] ^ chaotic_value
-                else:
-                    encrypted_image[i, j, c] = encrypted_image[i, j, c] ^ chaotic_value
-    
-    return encrypted_image
+    return encrypt_pixels_auto(image_array, chaotic_map, seed, **map_params)
 
 def decrypt_pixels(encrypted_image, chaotic_map, seed, **map_params):
     return encrypt_pixels(encrypted_image, chaotic_map, seed, **map_params)
 
+def encrypt_pixels_fixed(image_array, chaotic_map, key, **map_params):
+    keystream = fixed_keystream(chaotic_map, key, image_array.size, **map_params)
+    return image_array ^ keystream.reshape(image_array.shape)
+
+def decrypt_pixels_fixed(encrypted_image, chaotic_map, key, **map_params):
+    return encrypt_pixels_fixed(encrypted_image, chaotic_map, key, **map_params)
+
+def encrypt_img_master(image_array, master_key):
+    height, width = image_array.shape[:2]
+    perm_x, perm_y, keystream = generate_master_streams(master_key, height, width, image_array.size)
+    return encrypt_img(image_array, perm_x, perm_y) ^ keystream.reshape(image_array.shape)
+
+def decrypt_img_master(encrypted_image, master_key):
+    height, width = encrypted_image.shape[:2]
+    perm_x, perm_y, keystream = generate_master_streams(master_key, height, width, encrypted_image.size)
+    return decrypt_img(encrypted_image ^ keystream.reshape(encrypted_image.shape), perm_x, perm_y)
+
 class ChaoticCipherApp:
     def __init__(self, root):
         self.root = TkinterDnD.Tk() if not isinstance(root, tk.Tk) else root
@@ -94,6 +66,7 @@ class ChaoticCipherApp:
         self.root.geometry("1100x800")
         
         self.current_image = None
+        self.processed_meta = None
         self.mode = tk.StringVar(value="text")
         
         main_frame = ttk.Frame(root, padding="10")
@@ -119,7 +92,10 @@ class ChaoticCipherApp:
         maps = [
             ("Logistic映射", "logistic"),
             ("Chebyshev映射", "chebyshev"),
-            ("帐篷映射", "tent")
+            ("帐篷映射", "tent"),
+            ("Logistic定点", "logistic_fx"),
+            ("Chebyshev定点", "chebyshev_fx"),
+            ("帐篷定点", "tent_fx")
         ]
         for text, value in maps:
             ttk.Radiobutton(self.text_param_frame, text=text, value=value, 
@@ -135,6 +111,13 @@ class ChaoticCipherApp:
         self.image_param_frame.pack(fill=tk.X, pady=10, padx=5)
         self.image_param_frame.pack_forget()
         
+        master_key_frame = ttk.Frame(self.image_param_frame)
+        master_key_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(master_key_frame, text="主密钥:").pack(side=tk.LEFT)
+        self.master_key_var = tk.StringVar(value="")
+        ttk.Entry(master_key_frame, textvariable=self.master_key_var, width=22).pack(side=tk.LEFT, padx=5)
+        ttk.Label(self.image_param_frame, text=f"(格式 {MASTER_KEY_PREFIX}+16位十六进制，填写后忽略下方参数)").pack(anchor=tk.W)
+        
         ttk.Label(self.image_param_frame, text="位置加密参数 - 行").pack(anchor=tk.W, pady=(10, 5))
         
         ttk.Label(self.image_param_frame, text="选择混沌映射:").pack(anchor=tk.W, pady=5)
@@ -187,6 +170,7 @@ class ChaoticCipherApp:
         ttk.Button(self.text_button_frame, text="解密", command=self.decrypt).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.text_button_frame, text="清除", command=self.clear).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.text_button_frame, text="打开文件", command=self.open_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.text_button_frame, text="保存输出", command=self.save_text).pack(side=tk.LEFT, padx=5)
         
         self.image_button_frame = ttk.Frame(control_frame)
         self.image_button_frame.pack(fill=tk.X, pady=10)
@@ -211,18 +195,18 @@ class ChaoticCipherApp:
         input_frame = ttk.LabelFrame(self.text_frame, text="输入文本", padding="5")
         input_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        self.input_text = scrolledtext.ScrolledText(input_frame, wrap=tk.WORD, height=15)
+        self.input_text = PagedTextView(input_frame, height=15)
         self.input_text.pack(fill=tk.BOTH, expand=True)
-        self.input_text.insert("1.0", "输入文本或拖拽.txt文件")
-        self.input_text.bind("<FocusIn>", lambda e: self.input_text.delete("1.0", tk.END) if self.input_text.get("1.0", tk.END).strip() == "输入文本或拖拽.txt文件" else None)
+        self.input_text.set_text("输入文本或拖拽.txt文件")
+        self.input_text.text.bind("<FocusIn>", lambda e: self.input_text.set_text("") if self.input_text.get_text().strip() == "输入文本或拖拽.txt文件" else None)
         
-        self.input_text.drop_target_register(DND_FILES)
-        self.input_text.dnd_bind('<<Drop>>', self.on_text_drop)
+        self.input_text.text.drop_target_register(DND_FILES)
+        self.input_text.text.dnd_bind('<<Drop>>', self.on_text_drop)
         
         output_frame = ttk.LabelFrame(self.text_frame, text="输出文本", padding="5")
         output_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, height=15)
+        self.output_text = PagedTextView(output_frame, height=15)
         self.output_text.pack(fill=tk.BOTH, expand=True)
         
         self.image_frame = ttk.Frame(self.right_frame)
@@ -278,26 +262,33 @@ class ChaoticCipherApp:
         elif mode == "image":
             self.status_var.set("已选择图片加密模式")
     
-    def get_text(self, text_widget):
-        content = text_widget.get("1.0", tk.END)
-        if content.endswith('\n'):
-            content = content[:-1]
-        return content
+    def get_text(self, text_view):
+        return text_view.get_text()
     
     def get_map(self, map_type):
-        if map_type == "logistic":
-            return logistic_map, {"mu": 3.99}
-        elif map_type == "chebyshev":
-            return chebyshev_map, {"n": 3}
-        else:
-            return tent_map, {"mu": 1.99}
+        chaotic_map, params = MAPS[map_type]
+        return chaotic_map, dict(params)
+    
+    def is_fixed(self, map_type):
+        return map_type.endswith("_fx")
+    
+    # 浮点映射的种子为小数，定点映射的种子为 fx1- 格式的64位密钥
+    def parse_seed(self, map_type, seed_str):
+        if self.is_fixed(map_type):
+            return parse_fixed_key(seed_str)
+        return float(seed_str)
+    
+    def make_perm(self, map_type, seed, size):
+        chaotic_map, params = self.get_map(map_type)
+        if self.is_fixed(map_type):
+            return generate_permutation_fixed(chaotic_map, seed, size, **params)
+        return generate_permutation_auto(chaotic_map, seed, size, **params)
     
     def get_perm_text(self, size):
         map_type = self.text_map_var.get()
-        seed = float(self.text_seed_var.get())
+        seed = self.parse_seed(map_type, self.text_seed_var.get())
         
-        chaotic_map, params = self.get_map(map_type)
-        return generate_permutation(chaotic_map, seed, size, **params)
+        return self.make_perm(map_type, seed, size)
     
     def get_perm_img(self, size, dimension="row"):
         if dimension == "row":
@@ -308,15 +299,14 @@ class ChaoticCipherApp:
             seed_str = self.col_seed_var.get()
         
         try:
-            seed = float(seed_str)
+            seed = self.parse_seed(map_type, seed_str)
             if seed == 0:
                 return list(range(size))
         except ValueError:
             messagebox.showwarning("警告", f"无效的种子值: {seed_str}")
             return list(range(size))
         
-        chaotic_map, params = self.get_map(map_type)
-        return generate_permutation(chaotic_map, seed, size, **params)
+        return self.make_perm(map_type, seed, size)
     
     def encrypt(self):
         try:
@@ -326,8 +316,7 @@ class ChaoticCipherApp:
                 return
             permutation = self.get_perm_text(len(text))
             encrypted = encrypt_text(text, permutation)
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert("1.0", encrypted)
+            self.output_text.set_text(encrypted)
             self.status_var.set(f"加密完成，使用{self.text_map_var.get()}映射")
         except Exception as e:
             messagebox.showerror("错误", f"加密过程中出现错误: {str(e)}")
@@ -344,8 +333,7 @@ class ChaoticCipherApp:
             permutation = self.get_perm_text(len(text))
             
             decrypted = decrypt_text(text, permutation)
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert("1.0", decrypted)
+            self.output_text.set_text(decrypted)
             self.status_var.set("解密完成")
         except Exception as e:
             messagebox.showerror("错误", f"解密过程中出现错误: {str(e)}")
@@ -353,9 +341,8 @@ class ChaoticCipherApp:
             traceback.print_exc()
     
     def clear(self):
-        self.input_text.delete("1.0", tk.END)
-        self.input_text.insert("1.0", "输入文本或拖拽.txt文件")
-        self.output_text.delete("1.0", tk.END)
+        self.input_text.set_text("输入文本或拖拽.txt文件")
+        self.output_text.set_text("")
         self.status_var.set("准备就绪")
     
     def open_file(self):
@@ -366,6 +353,28 @@ class ChaoticCipherApp:
         if file_path:
             self.load_text(file_path)
     
+    def save_text(self):
+        # 直接写出后备缓冲区，虚拟模式下也能得到完整的输出文本
+        content = self.get_text(self.output_text)
+        if not content:
+            messagebox.showwarning("警告", "没有可保存的输出文本")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")]
+        )
+        
+        if file_path:
+            try:
+                with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+                self.status_var.set(f"输出文本已保存至 {file_path}")
+            except Exception as e:
+                messagebox.showerror("错误", f"保存文本时出错: {str(e)}")
+                import traceback
+                traceback.print_exc()
+    
     def on_text_drop(self, event):
         file_path = event.data
         file_path = file_path.strip('{}')
@@ -379,19 +388,17 @@ class ChaoticCipherApp:
     
     def load_text(self, file_path):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(file_path, 'r', encoding='utf-8', newline='') as f:
                 content = f.read()
             
-            self.input_text.delete("1.0", tk.END)
-            self.input_text.insert("1.0", content)
+            self.input_text.set_text(content)
             self.status_var.set(f"已加载文件: {os.path.basename(file_path)}")
         except Exception as e:
             messagebox.showerror("错误", f"加载文件时出错: {str(e)}")
             try:
-                with open(file_path, 'r', encoding='gbk') as f:
+                with open(file_path, 'r', encoding='gbk', newline='') as f:
                     content = f.read()
-                self.input_text.delete("1.0", tk.END)
-                self.input_text.insert("1.0", content)
+                self.input_text.set_text(content)
                 self.status_var.set(f"已加载文件: {os.path.basename(file_path)}（GBK编码）")
             except Exception as e2:
                 messagebox.showerror("错误", f"尝试使用GBK编码读取也失败: {str(e2)}")
@@ -401,7 +408,7 @@ class ChaoticCipherApp:
     def open_img(self):
         file_path = filedialog.askopenfilename(
             title="选择图片",
-            filetypes=[("图像文件", "*.png *.jpg *.jpeg *.bmp *.gif")]
+            filetypes=[("图像文件", "*.png *.jpg *.jpeg *.bmp *.gif"), ("加密图像容器", "*.ccimg")]
         )
         if file_path:
             self.load_img(file_path)
@@ -412,12 +419,15 @@ class ChaoticCipherApp:
         if file_path.startswith('"') and file_path.endswith('"'):
             file_path = file_path[1:-1]
         
-        if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
+        if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.ccimg')):
             self.load_img(file_path)
         else:
             messagebox.showwarning("警告", "请选择有效的图片文件")
     
     def load_img(self, file_path):
+        if file_path.lower().endswith('.ccimg'):
+            self.load_container_img(file_path)
+            return
         try:
             image = Image.open(file_path)
             
@@ -436,24 +446,76 @@ class ChaoticCipherApp:
             import traceback
             traceback.print_exc()
     
+    def load_container_img(self, file_path):
+        try:
+            self.current_image, header = load_container(file_path)
+            
+            # 只恢复加密时使用的映射，种子和主密钥不保存在文件中，需要手动输入
+            maps = header.get("maps", {})
+            for key, map_var in [("row", self.row_map_var), ("col", self.col_map_var),
+                                 ("pixel", self.pixel_map_var)]:
+                if key in maps:
+                    map_var.set(maps[key])
+            
+            preview = Image.fromarray(self.current_image)
+            preview.thumbnail((400, 400), Image.LANCZOS)
+            self.show_img(self.original_image_label, preview)
+            
+            self.processed_image_label.config(image='')
+            
+            self.status_var.set(f"已加载加密图像容器: {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("错误", f"加载加密图像容器时出错: {str(e)}")
+            import traceback
+            traceback.print_exc()
+    
+    # 容器头部只记录加密时实际使用的映射和参数，不包含任何种子或密钥
+    # 主密钥模式下派生出的映射也与密钥相关，同样不写入
+    def container_meta(self, maps, master=False):
+        if master:
+            return {"key_schedule": MASTER_KEY_PREFIX.rstrip("-"), "transient": 1000, "rounds": 1}
+        params = {key: self.get_map(map_type)[1] for key, map_type in maps.items()}
+        return {"maps": dict(maps), "params": params, "transient": 1000, "rounds": 1}
+    
     def show_img(self, label, image):
         photo = ImageTk.PhotoImage(image)
         label.config(image=photo)
         label.image = photo
     
+    # 主密钥模式: 行、列、像素序列一次生成，完成整个混合加密/解密
+    def crypt_img_master(self, master_key, decrypt=False):
+        if decrypt:
+            processed_image = decrypt_img_master(self.current_image, master_key)
+        else:
+            processed_image = encrypt_img_master(self.current_image, master_key)
+        
+        self.show_img(self.processed_image_label, Image.fromarray(processed_image))
+        self.processed_image = processed_image
+        self.processed_meta = None if decrypt else self.container_meta({}, master=True)
+        
+        schedule = derive_key_schedule(master_key)
+        maps = "/".join(schedule[key][0] for key in ("row", "col", "pixel"))
+        self.status_var.set(f"图片{'解密' if decrypt else '加密'}完成: 主密钥模式（行/列/像素: {maps}）")
+    
     def encrypt_img(self):
         try:
             if self.current_image is None:
                 messagebox.showwarning("警告", "请先加载图片")
                 return
             
+            master_key = self.master_key_var.get().strip()
+            if master_key:
+                self.crypt_img_master(master_key)
+                return
+            
             processed_image = np.copy(self.current_image)
             
             height, width = processed_image.shape[:2]
             encryption_steps = []
+            applied_maps = {}
             
-            row_seed = float(self.row_seed_var.get())
-            col_seed = float(self.col_seed_var.get())
+            row_seed = self.parse_seed(self.row_map_var.get(), self.row_seed_var.get())
+            col_seed = self.parse_seed(self.col_map_var.get(), self.col_seed_var.get())
             
             if row_seed != 0 or col_seed != 0:
                 perm_x = self.get_perm_img(width, "column")
@@ -461,6 +523,10 @@ class ChaoticCipherApp:
                 
                 if perm_x != list(range(width)) or perm_y != list(range(height)):
                     processed_image = encrypt_img(processed_image, perm_x, perm_y)
+                    if row_seed != 0:
+                        applied_maps["row"] = self.row_map_var.get()
+                    if col_seed != 0:
+                        applied_maps["col"] = self.col_map_var.get()
                     
                     if row_seed != 0 and col_seed != 0:
                         encryption_steps.append(f"位置加密（行列均已置乱）")
@@ -471,13 +537,16 @@ class ChaoticCipherApp:
             
             pixel_seed_str = self.pixel_seed_var.get()
             try:
-                pixel_seed = float(pixel_seed_str)
+                pixel_map_type = self.pixel_map_var.get()
+                pixel_seed = self.parse_seed(pixel_map_type, pixel_seed_str)
                 if pixel_seed != 0:
-                    pixel_map_type = self.pixel_map_var.get()
-                    
                     chaotic_map, params = self.get_map(pixel_map_type)
                     
-                    processed_image = encrypt_pixels(processed_image, chaotic_map, pixel_seed, **params)
+                    if self.is_fixed(pixel_map_type):
+                        processed_image = encrypt_pixels_fixed(processed_image, chaotic_map, pixel_seed, **params)
+                    else:
+                        processed_image = encrypt_pixels(processed_image, chaotic_map, pixel_seed, **params)
+                    applied_maps["pixel"] = pixel_map_type
                     encryption_steps.append(f"像素值加密（{pixel_map_type}映射）")
             except ValueError:
                 messagebox.showwarning("警告", f"无效的像素值种子: {pixel_seed_str}")
@@ -490,6 +559,7 @@ class ChaoticCipherApp:
             self.show_img(self.processed_image_label, encrypted_pil)
             
             self.processed_image = processed_image
+            self.processed_meta = self.container_meta(applied_maps)
             
             self.status_var.set(f"图片加密完成: {', '.join(encryption_steps)}")
         except Exception as e:
@@ -503,23 +573,31 @@ class ChaoticCipherApp:
                 messagebox.showwarning("警告", "请先加载图片")
                 return
             
+            master_key = self.master_key_var.get().strip()
+            if master_key:
+                self.crypt_img_master(master_key, decrypt=True)
+                return
+            
             processed_image = np.copy(self.current_image)
             height, width = processed_image.shape[:2]
             decryption_steps = []
             
             pixel_seed_str = self.pixel_seed_var.get()
             try:
-                pixel_seed = float(pixel_seed_str)
+                pixel_map_type = self.pixel_map_var.get()
+                pixel_seed = self.parse_seed(pixel_map_type, pixel_seed_str)
                 if pixel_seed != 0:
-                    pixel_map_type = self.pixel_map_var.get()
                     chaotic_map, params = self.get_map(pixel_map_type)
-                    processed_image = decrypt_pixels(processed_image, chaotic_map, pixel_seed, **params)
+                    if self.is_fixed(pixel_map_type):
+                        processed_image = decrypt_pixels_fixed(processed_image, chaotic_map, pixel_seed, **params)
+                    else:
+                        processed_image = decrypt_pixels(processed_image, chaotic_map, pixel_seed, **params)
                     decryption_steps.append(f"像素值解密（{pixel_map_type}映射）")
             except ValueError:
                 messagebox.showwarning("警告", f"无效的像素值种子: {pixel_seed_str}")
             
-            row_seed = float(self.row_seed_var.get())
-            col_seed = float(self.col_seed_var.get())
+            row_seed = self.parse_seed(self.row_map_var.get(), self.row_seed_var.get())
+            col_seed = self.parse_seed(self.col_map_var.get(), self.col_seed_var.get())
             
             if row_seed != 0 or col_seed != 0:
                 perm_x = self.get_perm_img(width, "column")
@@ -543,6 +621,8 @@ class ChaoticCipherApp:
             self.show_img(self.processed_image_label, decrypted_pil)
             
             self.processed_image = processed_image
+            # 解密结果不是密文，保存时不写入加密参数
+            self.processed_meta = None
             self.status_var.set(f"图片解密完成: {', '.join(decryption_steps)}")
             
         except Exception as e:
@@ -554,6 +634,7 @@ class ChaoticCipherApp:
         self.current_image = None
         if hasattr(self, 'processed_image'):
             del self.processed_image
+            self.processed_meta = None
         self.original_image_label.config(image='', text="选择图片或拖拽图片")
         self.processed_image_label.config(image='')
         self.status_var.set("准备就绪")
@@ -565,12 +646,15 @@ class ChaoticCipherApp:
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
-            filetypes=[("PNG", "*.png"), ("JPEG", "*.jpg"), ("BMP", "*.bmp")]
+            filetypes=[("PNG", "*.png"), ("加密图像容器", "*.ccimg"), ("JPEG", "*.jpg"), ("BMP", "*.bmp")]
         )
         
         if file_path:
             try:
-                Image.fromarray(self.processed_image).save(file_path)
+                if file_path.lower().endswith('.ccimg'):
+                    save_container(file_path, self.processed_image, **(self.processed_meta or {}))
+                else:
+                    Image.fromarray(self.processed_image).save(file_path)
                 self.status_var.set(f"图片已保存至 {file_path}")
             except Exception as e:
                 messagebox.showerror("错误", f"保存图片时出错: {str(e)}")
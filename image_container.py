@@ -0,0 +1,141 @@
+import numpy as np
+import json
+import struct
+import os
+
+# 容器格式:
+#   [固定前缀 | JSON头部 | 填充至页边界 | 原始像素数据(C顺序)]
+# 像素数据从页对齐的偏移处开始，可以直接用 np.memmap 映射，无需解码
+MAGIC = b"CCIMG\x00"
+VERSION = 1
+PAGE_SIZE = 4096
+PREFIX = struct.Struct("<6sHI")
+
+def align_offset(n, page_size=PAGE_SIZE):
+    return (n + page_size - 1) // page_size * page_size
+
+def make_header(shape, dtype, maps=None, params=None, seeds=None, transient=1000, rounds=1, **extra):
+    # seeds 为密钥材料，默认不写入；只有调用方显式传入时才会保存到头部
+    # dtype 统一存为显式字节序的小端格式，保证跨平台读取一致
+    dtype = np.dtype(dtype).newbyteorder("<")
+    header = {
+        "shape": [int(s) for s in shape],
+        "dtype": dtype.str,
+        "maps": dict(maps or {}),
+        "params": dict(params or {}),
+        "transient": int(transient),
+        "rounds": int(rounds),
+    }
+    if seeds:
+        header["seeds"] = dict(seeds)
+    header.update(extra)
+    return header
+
+def encode_header(header):
+    body = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    prefix = PREFIX.pack(MAGIC, VERSION, len(body))
+    data_offset = align_offset(len(prefix) + len(body))
+    return prefix + body + b"\x00" * (data_offset - len(prefix) - len(body))
+
+def read_header(file_path):
+    with open(file_path, "rb") as f:
+        return _read_header(f)
+
+def _read_header(f):
+    prefix = f.read(PREFIX.size)
+    if len(prefix) != PREFIX.size:
+        raise ValueError("文件过短，不是有效的加密图像容器")
+    magic, version, body_len = PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ValueError("文件标识不匹配，不是有效的加密图像容器")
+    if version != VERSION:
+        raise ValueError(f"不支持的容器版本: {version}")
+    body = f.read(body_len)
+    if len(body) != body_len:
+        raise ValueError("容器头部不完整")
+    header = json.loads(body.decode("utf-8"))
+    header["data_offset"] = align_offset(PREFIX.size + body_len)
+    return header
+
+def payload_size(header):
+    return int(np.prod(header["shape"], dtype=np.int64)) * np.dtype(header["dtype"]).itemsize
+
+class ContainerWriter:
+    # 流式写入: 先写头部，再按行块追加像素数据
+    def __init__(self, file_path, shape, dtype=np.uint8, **meta):
+        self.file_path = file_path
+        self.header = make_header(shape, dtype, **meta)
+        self.dtype = np.dtype(self.header["dtype"])
+        self.shape = tuple(self.header["shape"])
+        self.row_shape = self.shape[1:]
+        self.rows_written = 0
+        self.f = open(file_path, "wb")
+        self.f.write(encode_header(self.header))
+
+    def write(self, rows):
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.shape == self.row_shape:
+            rows = rows[np.newaxis]
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError(f"行形状不匹配: 期望 {self.row_shape}，实际 {rows.shape[1:]}")
+        if self.rows_written + rows.shape[0] > self.shape[0]:
+            raise ValueError("写入的行数超过了头部声明的高度")
+        self.f.write(np.ascontiguousarray(rows).tobytes())
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self.f is None:
+            return
+        self.f.close()
+        self.f = None
+        if self.rows_written != self.shape[0]:
+            raise ValueError(f"容器未写完: 已写入 {self.rows_written}/{self.shape[0]} 行")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.f is not None:
+            self.f.close()
+            self.f = None
+            return False
+        self.close()
+        return False
+
+def save_container(file_path, image_array, chunk_rows=256, **meta):
+    image_array = np.asarray(image_array)
+    with ContainerWriter(file_path, image_array.shape, image_array.dtype, **meta) as writer:
+        for start in range(0, image_array.shape[0], chunk_rows):
+            writer.write(image_array[start:start + chunk_rows])
+
+def open_container(file_path, mode="r"):
+    # 返回 (np.memmap, header)，像素数据直接映射，不做任何拷贝或解码
+    header = read_header(file_path)
+    expected = header["data_offset"] + payload_size(header)
+    if os.path.getsize(file_path) < expected:
+        raise ValueError("容器像素数据不完整")
+    image = np.memmap(file_path, dtype=np.dtype(header["dtype"]), mode=mode,
+                      offset=header["data_offset"], shape=tuple(header["shape"]))
+    return image, header
+
+def load_container(file_path):
+    image, header = open_container(file_path)
+    return np.array(image), header
+
+def iter_container(file_path, chunk_rows=256):
+    # 流式读取: 每次产出 chunk_rows 行，内存占用与图像大小无关
+    with open(file_path, "rb") as f:
+        header = _read_header(f)
+        dtype = np.dtype(header["dtype"])
+        shape = tuple(header["shape"])
+        row_shape = shape[1:]
+        row_bytes = int(np.prod(row_shape, dtype=np.int64)) * dtype.itemsize
+        f.seek(header["data_offset"])
+        remaining = shape[0]
+        while remaining > 0:
+            n = min(chunk_rows, remaining)
+            buf = f.read(n * row_bytes)
+            if len(buf) != n * row_bytes:
+                raise ValueError("容器像素数据不完整")
+            yield np.frombuffer(buf, dtype=dtype).reshape((n,) + row_shape)
+            remaining -= n
@@ -0,0 +1,106 @@
+import numpy as np
+from chaotic_permutation import (logistic_map, chebyshev_map, tent_map, FIXED_LANES,
+                                 init_fixed_lanes, step_fixed_lanes, run_fixed_lanes, fixed_to_bytes)
+
+# 密钥流与像素值异或扩散，供图像加密 (gui)、流式加密 (stream_cipher) 和后端选择 (autotune) 共用
+
+class FloatKeystream:
+    # 与 encrypt_pixels 的密钥流逐字节一致，逐个标量迭代，速度较慢
+    def __init__(self, chaotic_map, seed, transient=1000, **params):
+        self.chaotic_map = chaotic_map
+        self.params = params
+        self.x = seed
+        for _ in range(transient):
+            self.x = chaotic_map(self.x, **params)
+
+    def read(self, n):
+        chaotic_map, params = self.chaotic_map, self.params
+        x = self.x
+        out = np.empty(n, dtype=np.uint8)
+        for i in range(n):
+            x = chaotic_map(x, **params)
+            if chaotic_map == chebyshev_map:
+                out[i] = int(((x + 1) / 2) * 255)
+            else:
+                out[i] = int(x * 255)
+        self.x = x
+        return out
+
+class FixedKeystream:
+    # 定点映射多通道向量化迭代，与 fixed_keystream 产生的字节序列一致
+    def __init__(self, chaotic_map, key, transient=1000, lanes=FIXED_LANES, **params):
+        self.chaotic_map = chaotic_map
+        self.params = params
+        self.lanes = lanes
+        self.x, self.p = init_fixed_lanes(key, lanes)
+        for _ in range(transient):
+            self.x, self.p = step_fixed_lanes(chaotic_map, self.x, self.p, params)
+        self.pending = np.empty(0, dtype=np.uint8)
+
+    def read(self, n):
+        # 每次整步生成，多出的字节留到下一次读取
+        need = n - self.pending.shape[0]
+        if need > 0:
+            sequence, self.x, self.p = run_fixed_lanes(
+                self.chaotic_map, self.x, self.p, -(-need // self.lanes), self.params)
+            self.pending = np.concatenate([self.pending, fixed_to_bytes(sequence)])
+        out, self.pending = self.pending[:n], self.pending[n:]
+        return out
+
+def encrypt_pixels_loop(image_array, chaotic_map, seed, **map_params):
+    height, width = image_array.shape[:2]
+    channels = 1 if len(image_array.shape) == 2 else image_array.shape[2]
+    
+    encrypted_image = np.copy(image_array)
+    
+    x = seed
+    for _ in range(1000):
+        x = chaotic_map(x, **map_params)
+    
+    for i in range(height):
+        for j in range(width):
+            for c in range(channels):
+                x = chaotic_map(x, **map_params)
+                
+                if chaotic_map == chebyshev_map:
+                    chaotic_value = int(((x + 1) / 2) * 255)
+                else:
+                    chaotic_value = int(x * 255)
+                
+                if len(image_array.shape) == 2:
+                    encrypted_image[i, j] = encrypted_image[i, j] ^ chaotic_value
+                else:
+                    encrypted_image[i, j, c] = encrypted_image[i, j, c] ^ chaotic_value
+    
+    return encrypted_image
+
+def encrypt_pixels_buffered(image_array, chaotic_map, seed, **map_params):
+    # 密钥流仍逐个标量迭代 (浮点轨迹本质上是串行的)，先写入缓冲区，异或一次完成
+    # 与 encrypt_pixels_loop 一致，省去的只是逐像素的数组索引
+    keystream = FloatKeystream(chaotic_map, seed, **map_params).read(image_array.size)
+    return image_array ^ keystream.reshape(image_array.shape)
+
+def encrypt_pixels_inline(image_array, chaotic_map, seed, **map_params):
+    # 把 Logistic 和帐篷映射的运算内联到循环中，只用 Python 浮点数，避免每步的函数调用和 NumPy 标量开销
+    # 运算顺序与映射函数相同，结果逐字节一致；Chebyshev 的 cos/arccos 无法保证与 NumPy 一致，退回逐步调用
+    if chaotic_map is not logistic_map and chaotic_map is not tent_map:
+        return encrypt_pixels_buffered(image_array, chaotic_map, seed, **map_params)
+    mu = float(map_params.get("mu", chaotic_map.__defaults__[0]))
+    
+    x = float(seed)
+    out = bytearray(image_array.size)
+    if chaotic_map is logistic_map:
+        for _ in range(1000):
+            x = mu * x * (1 - x)
+        for i in range(len(out)):
+            x = mu * x * (1 - x)
+            out[i] = int(x * 255)
+    else:
+        for _ in range(1000):
+            x = mu * min(x, 1 - x)
+        for i in range(len(out)):
+            x = mu * min(x, 1 - x)
+            out[i] = int(x * 255)
+    
+    keystream = np.frombuffer(out, dtype=np.uint8)
+    return image_array ^ keystream.reshape(image_array.shape)
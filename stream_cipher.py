@@ -0,0 +1,148 @@
+import numpy as np
+import argparse
+import os
+import queue
+import sys
+import threading
+from chaotic_permutation import MAPS, parse_fixed_key
+from keystream import FloatKeystream, FixedKeystream
+
+# 流式字节加密: 与 encrypt_pixels 相同的异或扩散，作用于任意长度的字节流
+# 内存占用只与块大小和队列长度有关，与流的总长度无关
+CHUNK_SIZE = 1 << 20
+MAX_PENDING = 4
+# 读取线程等待队列空位的超时，超时后检查消费者是否已经停止
+PUT_TIMEOUT = 0.1
+
+def make_keystream(map_type, seed, transient=1000):
+    chaotic_map, params = MAPS[map_type]
+    if map_type.endswith("_fx"):
+        return FixedKeystream(chaotic_map, parse_fixed_key(seed), transient, **params)
+    return FloatKeystream(chaotic_map, float(seed), transient, **params)
+
+def read_chunks(source, chunk_size=CHUNK_SIZE):
+    # 支持文件对象 (优先使用 read1，有数据就返回) 和套接字 (recv)
+    if hasattr(source, "recv"):
+        read = source.recv
+    else:
+        read = getattr(source, "read1", None) or source.read
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def encrypt_stream(chunks, keystream):
+    for chunk in chunks:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        yield (data ^ keystream.read(data.shape[0])).tobytes()
+
+def decrypt_stream(chunks, keystream):
+    return encrypt_stream(chunks, keystream)
+
+def prefetch(chunks, max_pending=MAX_PENDING):
+    # 读取线程与加密并行；队列满时读取线程阻塞，形成背压
+    # 消费者提前停止 (关闭生成器或写出失败) 时通知读取线程退出，并清空队列
+    # maxsize 为 0 时 Queue 不限长度，失去背压，因此至少为 1
+    if max_pending < 1:
+        raise ValueError(f"队列长度必须为正整数: {max_pending}")
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    done = object()
+    error = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def reader():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+        except Exception as e:
+            error.append(e)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            chunk = pending.get()
+            if chunk is done:
+                finished = True
+                break
+            yield chunk
+    finally:
+        stop.set()
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                break
+        # 提前停止时读取线程可能正阻塞在 read 中，读完当前块后才会退出，不无限等待
+        thread.join(None if finished else PUT_TIMEOUT)
+    if error:
+        raise error[0]
+
+def pipe(source, sink, keystream, chunk_size=CHUNK_SIZE, max_pending=MAX_PENDING):
+    # read(0) 返回空字节，会被当作流结束而丢弃全部输入
+    if chunk_size < 1:
+        raise ValueError(f"块大小必须为正整数: {chunk_size}")
+    if max_pending < 1:
+        raise ValueError(f"队列长度必须为正整数: {max_pending}")
+    write = sink.sendall if hasattr(sink, "sendall") else sink.write
+    total = 0
+    for chunk in encrypt_stream(prefetch(read_chunks(source, chunk_size), max_pending), keystream):
+        write(chunk)
+        total += len(chunk)
+    if hasattr(sink, "flush"):
+        sink.flush()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="混沌映射流式字节加密/解密 (加密与解密是同一操作)")
+    parser.add_argument("--map", default="logistic_fx", choices=sorted(MAPS),
+                        help="混沌映射，带 _fx 后缀的为定点映射 (默认: logistic_fx)")
+    parser.add_argument("--seed", required=True,
+                        help="浮点映射为初始值，定点映射为 fx1- 格式的64位密钥")
+    parser.add_argument("-i", "--input", help="输入文件 (默认: 标准输入)")
+    parser.add_argument("-o", "--output", help="输出文件 (默认: 标准输出)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="每次读取的字节数")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="读取队列中最多缓存的块数")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error(f"--chunk-size 必须为正整数: {args.chunk_size}")
+    if args.max_pending < 1:
+        parser.error(f"--max-pending 必须为正整数: {args.max_pending}")
+
+    try:
+        keystream = make_keystream(args.map, args.seed)
+    except ValueError:
+        kind = "fx1- 格式的64位密钥" if args.map.endswith("_fx") else "浮点数"
+        parser.error(f"映射 {args.map} 需要{kind}作为种子，无效的种子: {args.seed}")
+    source = open(args.input, "rb") if args.input else sys.stdin.buffer
+    sink = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        total = pipe(source, sink, keystream, args.chunk_size, args.max_pending)
+    except BrokenPipeError:
+        # 下游提前关闭 (如 | head -c 10)，静默退出；把标准输出指向空设备，避免退出时刷新缓冲区再次报错
+        if not args.output:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+    print(f"已处理 {total} 字节", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
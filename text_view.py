@@ -0,0 +1,148 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+# 超过该长度的文本进入虚拟分页模式: 文本保存在后备缓冲区中，控件只渲染可见的一页
+EDIT_LIMIT = 200_000
+# 超长的行按该长度切分为多个显示行，避免单行过长拖慢 Tk
+ROW_CHUNK = 1000
+
+def build_row_offsets(text, row_chunk=ROW_CHUNK):
+    offsets = [0]
+    start = 0
+    length = len(text)
+    while start < length:
+        nl = text.find('\n', start, start + row_chunk)
+        end = nl + 1 if nl != -1 else min(start + row_chunk, length)
+        offsets.append(end)
+        start = end
+    return offsets
+
+class PagedTextView(ttk.Frame):
+    def __init__(self, master, edit_limit=EDIT_LIMIT, row_chunk=ROW_CHUNK, **text_options):
+        super().__init__(master)
+        self.edit_limit = edit_limit
+        self.row_chunk = row_chunk
+        self.buffer = ""
+        self.offsets = [0]
+        self.top = 0
+        self.page_rows = 1
+        self.virtual = False
+        self.all_selected = False
+
+        self.text = tk.Text(self, wrap=tk.WORD, **text_options)
+        self.v_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_v_scroll)
+        self.h_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+
+        self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<MouseWheel>", self.on_wheel)
+        self.text.bind("<Button-4>", lambda e: self.on_key_scroll(-3))
+        self.text.bind("<Button-5>", lambda e: self.on_key_scroll(3))
+        self.text.bind("<Prior>", lambda e: self.on_key_scroll(-self.page_rows))
+        self.text.bind("<Next>", lambda e: self.on_key_scroll(self.page_rows))
+        # 虚拟模式下控件中只有一页，全选后复制的应是整个缓冲区
+        self.text.bind("<Control-a>", self.on_select_all)
+        self.text.bind("<<SelectAll>>", self.on_select_all)
+        self.text.bind("<<Copy>>", self.on_copy)
+        self.text.bind("<Button-1>", lambda e: setattr(self, "all_selected", False), add="+")
+
+    @property
+    def row_count(self):
+        return len(self.offsets) - 1
+
+    def set_text(self, content):
+        self.buffer = content
+        self.top = 0
+        self.virtual = len(content) > self.edit_limit
+        self.all_selected = False
+
+        # 分页按显示行计算，虚拟模式不能自动换行；普通模式保持按词换行
+        self.text.config(state=tk.NORMAL, wrap=tk.NONE if self.virtual else tk.WORD)
+        self.text.delete("1.0", tk.END)
+        if self.virtual:
+            self.offsets = build_row_offsets(content, self.row_chunk)
+            self.text.config(yscrollcommand=lambda *args: None)
+            self.render()
+        else:
+            self.offsets = [0]
+            self.text.config(yscrollcommand=self.v_scroll.set)
+            self.text.insert("1.0", content)
+
+    def get_text(self):
+        # 虚拟模式直接返回后备缓冲区，不从控件中拷贝
+        if self.virtual:
+            return self.buffer
+        content = self.text.get("1.0", tk.END)
+        if content.endswith('\n'):
+            content = content[:-1]
+        return content
+
+    def render(self):
+        self.all_selected = False
+        rows = self.row_count
+        self.top = max(0, min(self.top, rows - self.page_rows))
+        bottom = min(self.top + self.page_rows, rows)
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", self.buffer[self.offsets[self.top]:self.offsets[bottom]])
+        self.text.config(state=tk.DISABLED)
+
+        if rows:
+            self.v_scroll.set(self.top / rows, bottom / rows)
+        else:
+            self.v_scroll.set(0, 1)
+
+    def scroll_to(self, top):
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def on_resize(self, event):
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        self.page_rows = max(1, event.height // max(1, linespace))
+        if self.virtual:
+            self.render()
+
+    def on_v_scroll(self, *args):
+        if not self.virtual:
+            self.text.yview(*args)
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.page_rows
+            self.scroll_to(self.top + step)
+
+    def on_wheel(self, event):
+        if not self.virtual:
+            return None
+        self.scroll_to(self.top - 3 * (1 if event.delta > 0 else -1))
+        return "break"
+
+    def on_select_all(self, event):
+        if not self.virtual:
+            return None
+        self.all_selected = True
+        self.text.tag_add(tk.SEL, "1.0", tk.END)
+        return "break"
+
+    def on_copy(self, event):
+        if not (self.virtual and self.all_selected):
+            return None
+        self.clipboard_clear()
+        self.clipboard_append(self.buffer)
+        return "break"
+
+    def on_key_scroll(self, rows):
+        if not self.virtual:
+            return None
+        self.scroll_to(self.top + rows)
+        return "break"
@@ -0,0 +1,61 @@
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 分块并行置乱: 输出按行切分为若干条带，每条带的 gather 在线程池中执行
+# NumPy 的 take 拷贝会释放 GIL，因此多线程可以同时利用多个核心
+TILE_ROWS = 256
+
+def check_permutation(perm):
+    # 退化的种子 (如 Chebyshev 取 0.5) 会使序列出现重复值，得到的不是置换
+    perm = np.asarray(perm, dtype=np.intp)
+    n = perm.shape[0]
+    if n and (perm.min() < 0 or perm.max() >= n or np.bincount(perm, minlength=n).max() != 1):
+        raise ValueError("置乱表不是有效的置换（存在重复或越界的位置），请更换种子")
+    return perm
+
+def inverse_permutation(perm):
+    perm = check_permutation(perm)
+    inverse = np.empty_like(perm)
+    inverse[perm] = np.arange(perm.shape[0], dtype=np.intp)
+    return inverse
+
+def permute_loop(image, row_index, col_index):
+    # 逐像素的纯 Python 实现，小图时没有线程和数组索引的额外开销
+    out = np.empty((len(row_index), len(col_index)) + image.shape[2:], dtype=image.dtype)
+    for r, i in enumerate(row_index):
+        for c, j in enumerate(col_index):
+            out[r, c] = image[i, j]
+    return out
+
+def gather_band(image, row_index, col_index, out, start, end):
+    # 默认的 mode="raise" 会先写入临时数组再拷贝到 out；索引已由 check_permutation 检查过，用 clip 直接写入
+    rows = np.take(image, row_index[start:end], axis=0)
+    np.take(rows, col_index, axis=1, out=out[start:end], mode="clip")
+
+def permute_tiled(image, row_index, col_index, tile_rows=None, workers=None):
+    # 输出 (r, c) 处取 image[row_index[r], col_index[c]]，所有条带共享同一组索引数组
+    # 条带高度在调用时读取 TILE_ROWS，修改模块常量即可调整 permute_auto 使用的分块
+    row_index = np.asarray(row_index, dtype=np.intp)
+    col_index = np.asarray(col_index, dtype=np.intp)
+    out = np.empty((row_index.shape[0], col_index.shape[0]) + image.shape[2:], dtype=image.dtype)
+
+    height = out.shape[0]
+    if tile_rows is None:
+        tile_rows = TILE_ROWS
+    bands = [(start, min(start + tile_rows, height)) for start in range(0, height, tile_rows)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(bands))
+
+    if workers <= 1:
+        for start, end in bands:
+            gather_band(image, row_index, col_index, out, start, end)
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(gather_band, image, row_index, col_index, out, start, end)
+                   for start, end in bands]
+        for future in futures:
+            future.result()
+    return out